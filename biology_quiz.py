@@ -1,28 +1,113 @@
+import hashlib
 import json
+import math
 import random
 import os
-from collections import defaultdict
+import pickle
+from array import array
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class FenwickTree:
+    """Binary indexed tree over question weights for O(log N) updates and sampling"""
+
+    def __init__(self, weights):
+        self.size = len(weights)
+        self.tree = [0.0] + list(weights)
+        # Build in O(N) by pushing each node into its parent
+        for i in range(1, self.size + 1):
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self.tree[parent] += self.tree[i]
+        self.top_bit = 1 << (self.size.bit_length() - 1) if self.size else 0
+
+    def update(self, idx, delta):
+        """Add delta to the weight at 0-based idx"""
+        if not 0 <= idx < self.size:
+            raise IndexError(f"question index {idx} out of range")
+        i = idx + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def total(self):
+        """Return the sum of all weights"""
+        total = 0.0
+        i = self.size
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def find_prefix(self, r):
+        """Return the first 0-based index whose running weight sum exceeds r"""
+        pos = 0
+        step = self.top_bit
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and self.tree[nxt] <= r:
+                pos = nxt
+                r -= self.tree[nxt]
+            step >>= 1
+        # Guard against float drift pushing r past the last question
+        return min(pos, self.size - 1)
+
+class QuizFileChangedError(Exception):
+    """The quiz file changed on disk while chapters were still being loaded from it"""
 
 class BiologyQuiz:
-    def __init__(self, quiz_file="quiz_data.json"):
+    def __init__(self, quiz_file="quiz_data.json", seed=None):
         self.quiz_file = quiz_file
+        # Own generator so draws are reproducible with a seed
+        self._rng = random.Random(seed)
+        # Per-chapter pickles of the quiz file, loaded only when a chapter is used
+        self.cache_dir = quiz_file + ".cache"
         self.quiz_data = {}
-        self.disabled_chapters = set()
-        self.user_stats = defaultdict(lambda: {"correct": 0, "incorrect": 0})
+        self.weights = {}
+        self.bit = {}
+        # Only replaced by toggle_chapter, which also refreshes _enabled_chapters
+        self.disabled_chapters = frozenset()
+        self._chapter_list = ()
+        self._chapter_index = {}
+        self._enabled_chapters = ()
+        # [correct, incorrect] per question, indexed by the question's "_id"
+        self.user_stats = []
+        self._dirty_chapters = set()
+        # (mtime_ns, size) of the quiz file the loaded data came from
+        self._stamp = None
+        self.weight_log_file = quiz_file + ".wal"
+        self._weight_log = None
         self.load_quiz_data()
+        self.replay_weight_log()
+        self.start_weight_log()
     
     def load_quiz_data(self):
-        """Load quiz data from a JSON file"""
+        """Load the chapter index, preferring a fresh per-chapter pickle cache"""
+        index_file = os.path.join(self.cache_dir, "index.pkl")
         try:
-            with open(self.quiz_file, 'r') as file:
-                data = json.load(file)
-                # Add weight to each question if not present
-                for chapter, questions in data.items():
-                    for question in questions:
-                        if "weight" not in question:
-                            question["weight"] = 1.0
-                self.quiz_data = data
+            with open(index_file, 'rb') as file:
+                index = pickle.load(file)
+            # Only trust the cache for exactly the file it was built from, a
+            # restored or swapped-in file can carry an older mtime
+            stamp = self.quiz_file_stamp()
+            if (isinstance(index, dict) and index.get("stamp") == stamp
+                    and isinstance(index.get("chapters"), list)
+                    and all(isinstance(chapter, str) for chapter in index["chapters"])):
+                self.reset_quiz_data(index["chapters"])
+                self._stamp = stamp
                 print(f"Successfully loaded quiz data from {self.quiz_file}")
+                return
+        except Exception:
+            # A damaged pickle can fail in many ways, any of them means the
+            # cache is unusable and the JSON file is read instead
+            pass
+
+        try:
+            self.reload_quiz_file()
+            print(f"Successfully loaded quiz data from {self.quiz_file}")
         except FileNotFoundError:
             print(f"Quiz file {self.quiz_file} not found.")
             self.create_sample_data()
@@ -30,10 +115,34 @@ class BiologyQuiz:
             print(f"Error reading the quiz file {self.quiz_file}. Invalid JSON format.")
             self.create_sample_data()
 
+    def quiz_file_stamp(self):
+        """Identify the quiz file's current contents by modification time and size"""
+        stat = os.stat(self.quiz_file)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def reload_quiz_file(self):
+        """Load every chapter from the JSON file and rebuild the cache from it"""
+        stamp = self.quiz_file_stamp()
+        data = self.read_quiz_file()
+        # Cache before the weights are split out of the question dicts
+        self.save_cache(data, data.keys(), stamp)
+        self.set_quiz_data(data)
+        self._stamp = stamp
+        self._dirty_chapters = set()
+        # Logged positions refer to the previous contents of the file
+        if self._weight_log:
+            self.start_weight_log()
+
+    def read_quiz_file(self):
+        """Parse the whole JSON quiz file"""
+        with open(self.quiz_file, 'rb') as file:
+            raw = file.read()
+        return orjson.loads(raw) if orjson else json.loads(raw)
+
     def create_sample_data(self):
         """Create sample data if file not found"""
         print("Creating sample quiz data...")
-        self.quiz_data = {
+        self.set_quiz_data({
             "Sample Chapter 1": [
                 {
                     "question": "What is the powerhouse of the cell?",
@@ -50,97 +159,277 @@ class BiologyQuiz:
                     "weight": 1.0
                 }
             ]
-        }
+        })
+        self._dirty_chapters.update(self._chapter_list)
         self.save_quiz_data()
 
+    def reset_quiz_data(self, chapters):
+        """Forget all loaded questions and start from a list of chapter names"""
+        self.quiz_data = {}
+        self.weights = {}
+        self.bit = {}
+        self.user_stats = []
+        self._refresh_chapter_list(chapters)
+
+    def set_quiz_data(self, data):
+        """Replace the quiz data with fully loaded chapters"""
+        self.reset_quiz_data(data.keys())
+        for chapter, questions in data.items():
+            self.add_chapter(chapter, questions)
+
+    def add_chapter(self, chapter, questions):
+        """Split question weights out into an array and index a chapter's questions"""
+        # Questions without a weight start at 1.0
+        self.weights[chapter] = array('d', (q.pop("weight", 1.0) for q in questions))
+        self.bit[chapter] = FenwickTree(self.weights[chapter])
+        for question in questions:
+            question["_id"] = len(self.user_stats)
+            self.user_stats.append([0, 0])
+            # Compare answers by option index, -1 if the answer is not among the options
+            options = question["options"]
+            correct_option = question["correct_option"]
+            question["_correct_idx"] = options.index(correct_option) if correct_option in options else -1
+        self.quiz_data[chapter] = questions
+
+    def load_chapter(self, chapter, allow_reload=True):
+        """Return a chapter's questions, reading them from the cache on first use"""
+        if chapter not in self._chapter_index:
+            return []
+        if chapter not in self.quiz_data:
+            try:
+                with open(self.chapter_cache_file(chapter), 'rb') as file:
+                    questions = pickle.load(file)
+                if not (isinstance(questions, list) and all(
+                        isinstance(q, dict) and isinstance(q.get("options"), list)
+                        and "question" in q and "correct_option" in q for q in questions)):
+                    raise ValueError(f"Damaged cache for chapter {chapter}")
+            except Exception:
+                # Missing or damaged pickle, fall back to the JSON file
+                stamp = self.quiz_file_stamp()
+                data = self.read_quiz_file()
+                if stamp != self._stamp or chapter not in data:
+                    # Reloading would drop unsaved weights or mix two versions
+                    # of the file into one export, so refuse instead
+                    if not allow_reload or self._dirty_chapters:
+                        raise QuizFileChangedError(
+                            f"Quiz file {self.quiz_file} changed on disk since it was loaded.")
+                    # Nothing unsaved yet, start over from the changed file
+                    print(f"Quiz file {self.quiz_file} changed, reloading it.")
+                    self.reload_quiz_file()
+                    return self.quiz_data.get(chapter, [])
+                # The file is unchanged but its cache is damaged, rebuild the
+                # whole cache from this parse so later loads skip the JSON
+                self.save_cache(data, data.keys(), stamp)
+                questions = data[chapter]
+            self.add_chapter(chapter, questions)
+        return self.quiz_data[chapter]
+
+    def _refresh_chapter_list(self, chapters):
+        """Cache the chapter names, call whenever chapters are added"""
+        self._chapter_list = tuple(chapters)
+        self._chapter_index = {chapter: i for i, chapter in enumerate(self._chapter_list)}
+        self._refresh_enabled_chapters()
+
+    def _refresh_enabled_chapters(self):
+        """Cache the enabled chapter names, call whenever a chapter is toggled"""
+        self._enabled_chapters = tuple(ch for ch in self._chapter_list if ch not in self.disabled_chapters)
+
+    def export_quiz_data(self):
+        """Build the serialisable form of the quiz data with weights folded back in"""
+        # Keys starting with an underscore are runtime-only and never persisted
+        return {
+            chapter: [
+                dict({k: v for k, v in question.items() if not k.startswith("_")}, weight=weight)
+                for question, weight in zip(self.load_chapter(chapter, allow_reload=False), self.weights[chapter])
+            ]
+            for chapter in self._chapter_list
+        }
+
     def save_quiz_data(self):
-        """Save quiz data to JSON file"""
-        with open(self.quiz_file, 'w') as file:
-            json.dump(self.quiz_data, file, indent=2)
+        """Save quiz data to JSON file if anything changed"""
+        if not self._dirty_chapters:
+            return
+        try:
+            data = self.export_quiz_data()
+        except QuizFileChangedError as error:
+            print(f"{error} Not saving over it.")
+            return
+        # Write compactly to a temporary file and swap it in atomically
+        tmp_file = self.quiz_file + ".tmp"
+        with open(tmp_file, 'wb') as file:
+            if orjson:
+                file.write(orjson.dumps(data))
+            else:
+                file.write(json.dumps(data, separators=(",", ":")).encode())
+        os.replace(tmp_file, self.quiz_file)
         print(f"Quiz data saved to {self.quiz_file}")
+        self._stamp = self.quiz_file_stamp()
+        self.save_cache(data, self._dirty_chapters, self._stamp)
+        self._dirty_chapters = set()
+        # Every logged weight is now in the JSON file
+        if self._weight_log:
+            self.start_weight_log()
+        elif os.path.exists(self.weight_log_file):
+            os.remove(self.weight_log_file)
+
+    def set_weight(self, chapter, idx, weight):
+        """Change a question's weight and append it to the weight log"""
+        self.bit[chapter].update(idx, weight - self.weights[chapter][idx])
+        self.weights[chapter][idx] = weight
+        self._dirty_chapters.add(chapter)
+        if self._weight_log:
+            self._weight_log.write(f"{self._chapter_index[chapter]}\t{idx}\t{weight!r}\n")
+            self._weight_log.flush()
+
+    def start_weight_log(self):
+        """Empty the weight log and tag it with the quiz file it applies to"""
+        if self._weight_log:
+            self._weight_log.seek(0)
+            self._weight_log.truncate()
+        else:
+            self._weight_log = open(self.weight_log_file, 'w')
+        mtime_ns, size = self._stamp
+        self._weight_log.write(f"#{mtime_ns}\t{size}\n")
+        self._weight_log.flush()
+
+    def replay_weight_log(self):
+        """Apply weights logged by a session that ended before saving"""
+        try:
+            with open(self.weight_log_file, 'r') as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            return
+
+        # A log written against other contents of the quiz file would patch
+        # the wrong questions, so it is only replayed for the same file
+        mtime_ns, size = self._stamp
+        if not lines or lines[0] != f"#{mtime_ns}\t{size}\n":
+            return
+
+        chapters = self._chapter_list
+        for line in lines[1:]:
+            # A line without its newline was cut short by a crash
+            if not line.endswith("\n"):
+                continue
+            try:
+                chapter_idx, idx, weight = line.split("\t")
+                chapter_idx, idx, weight = int(chapter_idx), int(idx), float(weight)
+                if not 0 <= chapter_idx < len(chapters):
+                    continue
+                chapter = chapters[chapter_idx]
+                if not (0 <= idx < len(self.load_chapter(chapter)) and 0 < weight < math.inf):
+                    continue
+                self.set_weight(chapter, idx, weight)
+            except ValueError:
+                # Skip entries that are not valid log lines
+                continue
+            except QuizFileChangedError as error:
+                # The file changed while replaying, leave the rest of the log alone
+                print(error)
+                return
+
+        # Fold the replayed weights into the JSON file and empty the log
+        self.save_quiz_data()
+
+    def chapter_cache_file(self, chapter):
+        """Path of the cached questions for a chapter, named after the chapter itself"""
+        # Hash the name so any chapter title is a valid file name
+        name = hashlib.sha1(chapter.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{name}.pkl")
+
+    def save_cache(self, data, chapters, stamp):
+        """Write the given chapters and the chapter index for the quiz file at stamp"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for chapter in chapters:
+                with open(self.chapter_cache_file(chapter), 'wb') as file:
+                    pickle.dump(data[chapter], file, protocol=pickle.HIGHEST_PROTOCOL)
+            # The index goes last so it is only fresh once every chapter is written
+            with open(os.path.join(self.cache_dir, "index.pkl"), 'wb') as file:
+                index = {"stamp": stamp, "chapters": list(data)}
+                pickle.dump(index, file, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            # The cache is only an optimisation, the JSON file stays authoritative
+            pass
 
     def list_chapters(self):
         """List all available chapters"""
         print("\nAvailable Chapters:")
-        for i, chapter in enumerate(self.quiz_data.keys(), 1):
+        for i, chapter in enumerate(self._chapter_list, 1):
             status = "Disabled" if chapter in self.disabled_chapters else "Enabled"
             print(f"{i}. {chapter} [{status}]")
     
     def toggle_chapter(self, chapter_idx):
         """Enable or disable a chapter"""
-        chapters = list(self.quiz_data.keys())
+        chapters = self._chapter_list
         if 1 <= chapter_idx <= len(chapters):
             chapter = chapters[chapter_idx - 1]
             if chapter in self.disabled_chapters:
-                self.disabled_chapters.remove(chapter)
+                self.disabled_chapters = self.disabled_chapters - {chapter}
                 print(f"Enabled: {chapter}")
             else:
-                self.disabled_chapters.add(chapter)
+                self.disabled_chapters = self.disabled_chapters | {chapter}
                 print(f"Disabled: {chapter}")
+            self._refresh_enabled_chapters()
         else:
             print("Invalid chapter number!")
 
     def select_question(self, chapter):
-        """Select a question based on weights"""
+        """Select the index of a question based on weights"""
         if chapter in self.disabled_chapters:
             return None
             
-        questions = self.quiz_data[chapter]
-        if not questions:
+        try:
+            if not self.load_chapter(chapter):
+                return None
+        except QuizFileChangedError as error:
+            print(error)
             return None
-            
-        # Calculate total weight
-        total_weight = sum(q["weight"] for q in questions)
-        if total_weight == 0:
+
+        bit = self.bit[chapter]
+        total_weight = bit.total()
+        if total_weight <= 0:
             # If all weights are 0, select with equal probability
-            return random.choice(questions)
-            
-        # Random number between 0 and total weight
-        r = random.uniform(0, total_weight)
-        cumulative_weight = 0
-        
-        # Select based on weight
-        for question in questions:
-            cumulative_weight += question["weight"]
-            if r <= cumulative_weight:
-                return question
-                
-        return questions[-1]  # Fallback
+            return self._rng.randrange(bit.size)
+
+        return bit.find_prefix(self._rng.random() * total_weight)
 
-    def ask_question(self, question):
+    def ask_question(self, chapter, idx):
         """Present a question to the user and get their answer"""
-        print(f"\n{question['question']}")
+        question = self.quiz_data[chapter][idx]
+        weights = self.weights[chapter]
+        options = question['options']
+        n_options = len(options)
         
-        # Create a list of options with their corresponding answer status
-        options = [(option, option == question['correct_option']) for option in question['options']]
+        # Randomize the order of options by shuffling their indices
+        order = list(range(n_options))
+        self._rng.shuffle(order)
         
-        # Randomize the order of options
-        random.shuffle(options)
-        
-        # Display randomized options
-        for i, (option, is_correct) in enumerate(options, 1):
-            print(f"{i}. {option}")
+        # Display the question and randomized options with a single print,
+        # the order changes on every ask so the block cannot be cached
+        numbered = "\n".join(f"{i}. {options[option_idx]}" for i, option_idx in enumerate(order, 1))
+        print(f"\n{question['question']}\n{numbered}")
         
         while True:
             try:
                 choice = int(input("\nEnter your choice (number): "))
-                if 1 <= choice <= len(options):
-                    selected_option, is_correct = options[choice - 1]
+                if 1 <= choice <= n_options:
+                    is_correct = order[choice - 1] == question["_correct_idx"]
                     
                     if is_correct:
                         print("✓ Correct!")
                         # Decrease weight (show less often)
-                        question["weight"] = max(0.1, question["weight"] - 0.3)
-                        self.user_stats[question["question"]]["correct"] += 1
+                        self.set_weight(chapter, idx, max(0.1, weights[idx] - 0.3))
+                        self.user_stats[question["_id"]][0] += 1
                     else:
                         print(f"✗ Incorrect. The correct answer is: {question['correct_option']}")
                         # Increase weight (show more often)
-                        question["weight"] += 0.5
-                        self.user_stats[question["question"]]["incorrect"] += 1
+                        self.set_weight(chapter, idx, weights[idx] + 0.5)
+                        self.user_stats[question["_id"]][1] += 1
                     
                     return is_correct
                 else:
-                    print(f"Please enter a number between 1 and {len(question['options'])}")
+                    print(f"Please enter a number between 1 and {n_options}")
             except ValueError:
                 print("Please enter a valid number")
 
@@ -152,13 +441,13 @@ class BiologyQuiz:
         correct_count = 0
         
         while True:
-            question = self.select_question(chapter)
-            if not question:
+            idx = self.select_question(chapter)
+            if idx is None:
                 print(f"No questions available in {chapter} or chapter is disabled.")
                 break
                 
             question_count += 1
-            if self.ask_question(question):
+            if self.ask_question(chapter, idx):
                 correct_count += 1
                 
             print(f"\nProgress: {correct_count}/{question_count} ({int(correct_count/question_count*100) if question_count else 0}% correct)")
@@ -174,7 +463,7 @@ class BiologyQuiz:
         """Test all enabled chapters"""
         print("\n--- Testing All Enabled Chapters ---")
         
-        enabled_chapters = [ch for ch in self.quiz_data.keys() if ch not in self.disabled_chapters]
+        enabled_chapters = self._enabled_chapters
         if not enabled_chapters:
             print("All chapters are disabled. Please enable at least one chapter.")
             return
@@ -182,18 +471,30 @@ class BiologyQuiz:
         question_count = 0
         correct_count = 0
         
-        # Create a list of questions from all enabled chapters
-        all_questions = []
-        for chapter in enabled_chapters:
-            all_questions.extend([(chapter, q) for q in self.quiz_data[chapter]])
-            
-        # Shuffle questions
-        random.shuffle(all_questions)
+        # Draw questions lazily instead of shuffling the whole bank up front.
+        # Picking a chapter by its total weight and then a question within it
+        # samples from the combined weights of all enabled chapters.
+        # Loading can reload a changed quiz file, so filter once all are loaded
+        try:
+            for chapter in enabled_chapters:
+                self.load_chapter(chapter)
+        except QuizFileChangedError as error:
+            print(error)
+            return
+        chapters = [ch for ch in self._enabled_chapters if self.quiz_data[ch]]
+        total_questions = sum(len(self.weights[ch]) for ch in chapters)
         
-        for chapter, question in all_questions:
+        while question_count < total_questions:
+            chapter_weights = [self.bit[ch].total() for ch in chapters]
+            if sum(chapter_weights) <= 0:
+                # If all weights are 0, select with equal probability
+                chapter_weights = None
+            chapter = self._rng.choices(chapters, weights=chapter_weights)[0]
+            idx = self.select_question(chapter)
+            
             print(f"\nChapter: {chapter}")
             question_count += 1
-            if self.ask_question(question):
+            if self.ask_question(chapter, idx):
                 correct_count += 1
                 
             print(f"\nProgress: {correct_count}/{question_count} ({int(correct_count/question_count*100)}% correct)")
@@ -210,19 +511,23 @@ class BiologyQuiz:
 
     def show_statistics(self):
         """Show user performance statistics"""
-        if not self.user_stats:
+        if not any(correct or incorrect for correct, incorrect in self.user_stats):
             print("\nNo statistics available yet.")
             return
             
         print("\n--- Your Statistics ---")
         
-        for question, stats in self.user_stats.items():
-            total = stats["correct"] + stats["incorrect"]
-            if total > 0:
-                accuracy = (stats["correct"] / total) * 100
-                print(f"\nQuestion: {question[:60]}..." if len(question) > 60 else f"\nQuestion: {question}")
-                print(f"Attempts: {total}, Correct: {stats['correct']}, Incorrect: {stats['incorrect']}")
-                print(f"Accuracy: {accuracy:.1f}%")
+        for chapter in self._chapter_list:
+            # Only chapters that were loaded can have statistics
+            for q in self.quiz_data.get(chapter, ()):
+                correct, incorrect = self.user_stats[q["_id"]]
+                total = correct + incorrect
+                if total > 0:
+                    question = q["question"]
+                    accuracy = (correct / total) * 100
+                    print(f"\nQuestion: {question[:60]}..." if len(question) > 60 else f"\nQuestion: {question}")
+                    print(f"Attempts: {total}, Correct: {correct}, Incorrect: {incorrect}")
+                    print(f"Accuracy: {accuracy:.1f}%")
 
     def run(self):
         """Run the quiz application"""
@@ -246,7 +551,7 @@ class BiologyQuiz:
                 self.list_chapters()
                 try:
                     chapter_idx = int(input("\nEnter chapter number to study: "))
-                    chapters = list(self.quiz_data.keys())
+                    chapters = self._chapter_list
                     if 1 <= chapter_idx <= len(chapters):
                         chapter = chapters[chapter_idx - 1]
                         if chapter in self.disabled_chapters:
@@ -274,6 +579,7 @@ class BiologyQuiz:
                 
             elif choice == '6':
                 print("Thank you for using the Biology Quiz Study Program!")
+                self._weight_log.close()
                 break
                 
             else:
@@ -1,5 +1,15 @@
 import json
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 # File paths
 file1_path = "quiz_data_og.json"
 file2_path = "quiz_data_og_2.json"
@@ -8,32 +18,41 @@ output_file_path = "combined_quiz_data.json"
 
 # Load JSON files
 def load_json(file_path):
-    with open(file_path, "r", encoding="utf-8") as file:
-        return json.load(file)
+    with open(file_path, "rb") as file:
+        raw = file.read()
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+
+# Stream the top-level (key, value) pairs of a JSON file
+def iter_json_items(file_path):
+    if ijson:
+        with open(file_path, "rb") as file:
+            yield from ijson.kvitems(file, "", use_float=True)
+    else:
+        yield from load_json(file_path).items()
 
 
-# Merge dictionaries
-def merge_json(dict1, dict2):
-    merged_dict = dict1.copy()
-    for key, value in dict2.items():
-        if key in merged_dict:
-            merged_dict[key].extend(value)  # Append questions if experiment exists
+# Merge items into the dictionary in place
+def merge_json(dict1, items):
+    for key, value in items:
+        if key in dict1:
+            dict1[key].extend(value)  # Append questions if experiment exists
         else:
-            merged_dict[key] = value  # Add new experiment
-    return merged_dict
+            dict1[key] = value  # Add new experiment
+    return dict1
 
 
 # Load data
 quiz_data_1 = load_json(file1_path)
-quiz_data_2 = load_json(file2_path)
 
-# Merge data
-combined_data = merge_json(quiz_data_1, quiz_data_2)
+# Merge data, streaming the second file into the first
+combined_data = merge_json(quiz_data_1, iter_json_items(file2_path))
 
-# Sort dictionary by experiment headers
-sorted_combined_data = dict(sorted(combined_data.items()))
+# Sort dictionary by experiment headers, sorting only the keys
+sorted_combined_data = {key: combined_data[key] for key in sorted(combined_data)}
 
 # Save merged and sorted data
+# Always through json so the format does not depend on whether orjson is installed
 with open(output_file_path, "w", encoding="utf-8") as output_file:
     json.dump(sorted_combined_data, output_file, indent=4, ensure_ascii=False)
 